@@ -5,6 +5,7 @@ from langgraph.graph.message import add_messages
 from langchain.chat_models import init_chat_model
 from pydantic import BaseModel, Field
 from typing_extensions import TypedDict
+from metrics import instrument, record_tokens
 
 load_dotenv()
 
@@ -25,9 +26,11 @@ class State(TypedDict):
     message_type: str | None
 
 
+@instrument("classifier")
 def classify_message(state: State):
     last_message = state["messages"][-1]
-    classifier_llm = llm.with_structured_output(MessageClassifier)
+    # include_raw keeps the AIMessage so its token usage can be recorded
+    classifier_llm = llm.with_structured_output(MessageClassifier, include_raw=True)
 
     result = classifier_llm.invoke([
         {
@@ -39,9 +42,15 @@ def classify_message(state: State):
         },
         {"role": "user", "content": last_message.content}
     ])
-    return {"message_type": result.message_type}
+    if result.get("raw") is not None:
+        record_tokens("classifier", result["raw"])
+    # include_raw returns parse failures instead of raising them
+    if result.get("parsing_error"):
+        raise result["parsing_error"]
+    return {"message_type": result["parsed"].message_type}
 
 
+@instrument("router")
 def router(state: State):
     message_type = state.get("message_type", "logical")
     if message_type == "emotional":
@@ -50,6 +59,7 @@ def router(state: State):
     return {"next": "logical"}
 
 
+@instrument("therapist")
 def therapist_agent(state: State):
     last_message = state["messages"][-1]
 
@@ -66,9 +76,11 @@ def therapist_agent(state: State):
         }
     ]
     reply = llm.invoke(messages)
+    record_tokens("therapist", reply)
     return {"messages": [{"role": "assistant", "content": reply.content}]}
 
 
+@instrument("logical")
 def logical_agent(state: State):
     last_message = state["messages"][-1]
 
@@ -85,6 +97,7 @@ def logical_agent(state: State):
         }
     ]
     reply = llm.invoke(messages)
+    record_tokens("logical", reply)
     return {"messages": [{"role": "assistant", "content": reply.content}]}
 
 
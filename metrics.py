@@ -0,0 +1,199 @@
+"""
+Lightweight per-node instrumentation for the LangGraph apps.
+
+Wrap graph nodes with `@instrument("name")` to collect latency histograms,
+call and error counts. Only the latency histogram is sampled; calls, errors
+and tokens are always counted. LLM/NLP token usage and cache hits are
+recorded explicitly with `record_tokens` / `record_cache`.
+
+Config (env vars):
+- METRICS_SAMPLE_RATE: fraction of node calls to time, in (0, 1] (default 1.0),
+  applied as "every Nth call of each node per thread" with N = round(1 / rate)
+- METRICS_JSONL: if set, a JSONL snapshot is appended to this path on exit
+"""
+
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+import warnings
+from collections import defaultdict
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+
+
+def _parse_sample_rate(value: str) -> float:
+    """Parse METRICS_SAMPLE_RATE, clamping to (0, 1] and warning on bad input."""
+    try:
+        rate = float(value)
+    except ValueError:
+        warnings.warn(f"METRICS_SAMPLE_RATE={value!r} is not a number; timing every call")
+        return 1.0
+    if rate > 1.0:
+        warnings.warn(f"METRICS_SAMPLE_RATE={value!r} is above 1; timing every call")
+        return 1.0
+    if not rate > 0.0:  # also catches NaN
+        warnings.warn(f"METRICS_SAMPLE_RATE={value!r} must be above 0; timing every call")
+        return 1.0
+    return rate
+
+
+SAMPLE_RATE = _parse_sample_rate(os.getenv("METRICS_SAMPLE_RATE", "1.0"))
+_SAMPLE_EVERY = max(1, round(1 / SAMPLE_RATE))
+
+_lock = threading.Lock()
+_local = threading.local()        # per-thread, per-node call counters for sampling
+_latency_buckets = defaultdict(lambda: [0] * len(BUCKETS))
+_latency_sum = defaultdict(float)
+_latency_count = defaultdict(int)
+_calls = defaultdict(int)
+_errors = defaultdict(int)
+_tokens = defaultdict(int)        # (node, "input" | "output") -> count
+_cache = defaultdict(int)         # (node, "hit" | "miss") -> count
+
+
+def _sampled(node: str) -> bool:
+    # Counted per node, so nodes that always run in the same order are all sampled
+    if _SAMPLE_EVERY == 1:
+        return True
+    counts = getattr(_local, "calls", None)
+    if counts is None:
+        counts = _local.calls = {}
+    n = counts.get(node, 0) + 1
+    counts[node] = n
+    return n % _SAMPLE_EVERY == 0
+
+
+def _observe(node: str, seconds: float | None, failed: bool):
+    with _lock:
+        _calls[node] += 1
+        if failed:
+            _errors[node] += 1
+        if seconds is None:
+            return
+        buckets = _latency_buckets[node]
+        for i, upper in enumerate(BUCKETS):
+            if seconds <= upper:
+                buckets[i] += 1
+                break
+        _latency_sum[node] += seconds
+        _latency_count[node] += 1
+
+
+def record_error(node: str):
+    """Count an error that the node handled itself instead of raising."""
+    with _lock:
+        _errors[node] += 1
+
+
+def instrument(node: str):
+    """Decorator counting calls and errors of a node or LLM/NLP call, and timing a sample.
+
+    Every call takes the lock once to bump its counters; unsampled calls skip the
+    two clock reads and the histogram update.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            sampled = _sampled(node)
+            start = time.perf_counter() if sampled else 0.0
+            failed = False
+            try:
+                return fn(*args, **kwargs)
+            except Exception:
+                failed = True
+                raise
+            finally:
+                _observe(node, time.perf_counter() - start if sampled else None, failed)
+        return wrapper
+    return decorator
+
+
+def record_tokens(node: str, response=None, input_tokens: int = 0, output_tokens: int = 0):
+    """Record token usage, read from a LangChain/OpenAI response or passed explicitly."""
+    usage = getattr(response, "usage_metadata", None)  # LangChain AIMessage
+    if usage:
+        input_tokens += usage.get("input_tokens", 0)
+        output_tokens += usage.get("output_tokens", 0)
+    usage = getattr(response, "usage", None)  # OpenAI ChatCompletion
+    if usage is not None:
+        input_tokens += getattr(usage, "prompt_tokens", 0) or 0
+        output_tokens += getattr(usage, "completion_tokens", 0) or 0
+    with _lock:
+        _tokens[(node, "input")] += input_tokens
+        _tokens[(node, "output")] += output_tokens
+
+
+def record_cache(node: str, hit: bool):
+    """Count a cache lookup as a hit or a miss."""
+    with _lock:
+        _cache[(node, "hit" if hit else "miss")] += 1
+
+
+def snapshot() -> dict:
+    """Return a JSON-serialisable copy of all metrics, keyed by node."""
+    with _lock:
+        nodes = set(_calls) | set(_errors) | {n for n, _ in _tokens} | {n for n, _ in _cache}
+        data = {}
+        for node in sorted(nodes):
+            calls = _calls.get(node, 0)
+            data[node] = {
+                "calls": calls,
+                "errors": _errors.get(node, 0),
+                "error_rate": _errors.get(node, 0) / calls if calls else 0.0,
+                "latency_count": _latency_count.get(node, 0),
+                "latency_sum_seconds": _latency_sum.get(node, 0.0),
+                "latency_buckets": dict(zip(map(str, BUCKETS), _latency_buckets.get(node, [0] * len(BUCKETS)))),
+                "input_tokens": _tokens.get((node, "input"), 0),
+                "output_tokens": _tokens.get((node, "output"), 0),
+                "cache_hits": _cache.get((node, "hit"), 0),
+                "cache_misses": _cache.get((node, "miss"), 0),
+            }
+        return {"timestamp": time.time(), "sample_rate": SAMPLE_RATE, "nodes": data}
+
+
+def to_prometheus() -> str:
+    """Render all metrics in the Prometheus text exposition format."""
+    nodes = snapshot()["nodes"]
+    lines = [
+        "# HELP node_latency_seconds Node call latency (sampled).",
+        "# TYPE node_latency_seconds histogram",
+    ]
+    for node, m in nodes.items():
+        cumulative = 0
+        for upper, count in m["latency_buckets"].items():
+            cumulative += count
+            le = "+Inf" if upper == "inf" else upper
+            lines.append(f'node_latency_seconds_bucket{{node="{node}",le="{le}"}} {cumulative}')
+        lines.append(f'node_latency_seconds_sum{{node="{node}"}} {m["latency_sum_seconds"]}')
+        lines.append(f'node_latency_seconds_count{{node="{node}"}} {m["latency_count"]}')
+
+    lines += ["# HELP node_calls_total Node calls.", "# TYPE node_calls_total counter"]
+    lines += [f'node_calls_total{{node="{node}"}} {m["calls"]}' for node, m in nodes.items()]
+
+    lines += ["# HELP node_errors_total Node errors.", "# TYPE node_errors_total counter"]
+    lines += [f'node_errors_total{{node="{node}"}} {m["errors"]}' for node, m in nodes.items()]
+
+    lines += ["# HELP node_tokens_total LLM/NLP tokens used.", "# TYPE node_tokens_total counter"]
+    for node, m in nodes.items():
+        lines.append(f'node_tokens_total{{node="{node}",kind="input"}} {m["input_tokens"]}')
+        lines.append(f'node_tokens_total{{node="{node}",kind="output"}} {m["output_tokens"]}')
+
+    lines += ["# HELP node_cache_requests_total Cache lookups.", "# TYPE node_cache_requests_total counter"]
+    for node, m in nodes.items():
+        lines.append(f'node_cache_requests_total{{node="{node}",result="hit"}} {m["cache_hits"]}')
+        lines.append(f'node_cache_requests_total{{node="{node}",result="miss"}} {m["cache_misses"]}')
+    return "\n".join(lines) + "\n"
+
+
+def dump_jsonl(path: str):
+    """Append the current snapshot as one JSON line."""
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(snapshot()) + "\n")
+
+
+if os.getenv("METRICS_JSONL"):
+    atexit.register(dump_jsonl, os.environ["METRICS_JSONL"])
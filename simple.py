@@ -4,6 +4,7 @@ from langgraph.graph import StateGraph, START, END
 from langgraph.graph.message import add_messages
 from langchain.chat_models import init_chat_model
 from dotenv import load_dotenv
+from metrics import instrument, record_tokens
 
 load_dotenv()
 
@@ -20,8 +21,11 @@ class State(TypedDict):
 graph_builder = StateGraph(State)
 
 
+@instrument("chatbot")
 def chatbot(state: State):
-    return {"messages": [llm.invoke(state["messages"])]}
+    reply = llm.invoke(state["messages"])
+    record_tokens("chatbot", reply)
+    return {"messages": [reply]}
 
 
 # The first argument is the unique node name
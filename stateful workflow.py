@@ -1,12 +1,22 @@
 # pip install langgrap
 
-from typing import List, TypedDict
+import logging
+import operator
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Annotated, List, TypedDict
+from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import StateGraph, END
+from metrics import instrument
+
+logger = logging.getLogger(__name__)
 
 
 # ---- Define state schema properly ----
 class ConversationState(TypedDict):
-    messages: List[str]
+    # operator.add appends the lists returned by nodes, so nodes only return new messages
+    messages: Annotated[List[str], operator.add]
 
 
 # ---- Mock LLM (no API needed) 
@@ -21,18 +31,19 @@ def mock_llm(user_message: str) -> str:
 
 
 # ---- Workflow Nodes ----
-def process_input(state: ConversationState) -> ConversationState:
+@instrument("process_input")
+def process_input(state: ConversationState) -> dict:
     user_message = state["messages"][-1]  # last user message
-    print(f"[User Input Node] Received: {user_message}")
-    return state
+    logger.debug("[User Input Node] Received: %s", user_message)
+    return {}
 
 
-def generate_response(state: ConversationState) -> ConversationState:
+@instrument("generate_response")
+def generate_response(state: ConversationState) -> dict:
     user_message = state["messages"][-1]
     ai_message = mock_llm(user_message)  # use mock LLM
-    state["messages"].append(ai_message)
-    print(f"[AI Response Node] Generated: {ai_message}")
-    return state
+    logger.debug("[AI Response Node] Generated: %s", ai_message)
+    return {"messages": [ai_message]}
 
 
 # ---- Build Workflow ----
@@ -46,14 +57,80 @@ workflow.set_entry_point("process_input")
 workflow.add_edge("process_input", "generate_response")
 workflow.add_edge("generate_response", END)
 
-# Compile
-app = workflow.compile()
+# Compile; the checkpointer keeps each conversation's history per thread_id,
+# so a turn only sends the new user message
+app = workflow.compile(checkpointer=MemorySaver())
+
+
+# ---- Multi-turn Driver ----
+SYNTHETIC_TURNS = ["hello", "what's the weather like?", "tell me a joke", "thanks", "bye"]
+
+
+def run_conversation(thread_id: str, turns: int) -> None:
+    """Run one synthetic conversation through `app`, sending only the new user message each turn."""
+    config = {"configurable": {"thread_id": thread_id}}
+    for i in range(turns):
+        user_message = SYNTHETIC_TURNS[i % len(SYNTHETIC_TURNS)]
+        app.invoke({"messages": [user_message]}, config)
+
+
+def _run_and_discard(thread_id: str, turns: int) -> None:
+    run_conversation(thread_id, turns)
+    app.checkpointer.delete_thread(thread_id)  # keep benchmark threads out of app's saver
+
+
+def run_driver(conversations: int = 2000, turns: int = 5, workers: int = 8, memory_sample: int = 100) -> dict:
+    """Run many conversations through `app` on a thread pool and report throughput and memory.
+
+    `bytes_per_conversation` is the memory app's MemorySaver retains per thread after
+    `turns` turns: every checkpoint of the conversation plus its pending writes.
+    """
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda i: _run_and_discard(f"bench-{i}", turns), range(conversations)))
+    elapsed = time.perf_counter() - start
+
+    # Measured separately on a small sample, since tracemalloc slows everything down
+    tracemalloc.start()
+    _run_and_discard("warmup", 1)  # exclude one-time allocations from the sample
+    baseline, _ = tracemalloc.get_traced_memory()
+    thread_ids = [f"memory-{i}" for i in range(memory_sample)]
+    for thread_id in thread_ids:
+        run_conversation(thread_id, turns)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    for thread_id in thread_ids:
+        app.checkpointer.delete_thread(thread_id)
+
+    return {
+        "conversations": conversations,
+        "turns_per_second": conversations * turns / elapsed,
+        "bytes_per_conversation": (current - baseline) / memory_sample,
+    }
 
 
 # ---- Run Example ----
 if __name__ == "__main__":
-    # Start with a user message inside dict
-    state = {"messages": ["hello"]}
-    result = app.invoke(state)
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bench", action="store_true", help="run the multi-turn throughput driver")
+    parser.add_argument("--conversations", type=int, default=2000)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("-v", "--verbose", action="store_true", help="log every node call")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING)
+
+    if args.bench:
+        stats = run_driver(args.conversations, args.turns, args.workers)
+        print(f"Conversations: {stats['conversations']}")
+        print(f"Turns/sec: {stats['turns_per_second']:.1f}")
+        print(f"Memory/conversation: {stats['bytes_per_conversation'] / 1024:.1f} KiB")
+    else:
+        # Start with a user message inside dict
+        state = {"messages": ["hello"]}
+        result = app.invoke(state, {"configurable": {"thread_id": "example"}})
 
-    print("\nFinal State:", result)
+        print("\nFinal State:", result)
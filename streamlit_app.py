@@ -1,9 +1,11 @@
 import os
+import re
 import streamlit as st
 from openai import OpenAI
 from langgraph.graph import StateGraph
 from typing import TypedDict, Annotated
 from graphviz import Digraph
+from metrics import instrument, record_error, record_tokens, snapshot
 
 st.set_page_config(page_title="LangGraph Cluster Assistant", page_icon="🤖", layout="wide")
 
@@ -24,18 +26,30 @@ MODEL_NAME = "katanemo/Arch-Router-1.5B:hf-inference"
 # ============================================
 # ✅ LangGraph State Definition
 # ============================================
+def merge_results(left: str, right: str) -> str:
+    """Join results written by parallel AI branches in the same step."""
+    if not left:
+        return right
+    if not right:
+        return left
+    return f"{left}\n\n{right}"
+
 class GraphState(TypedDict):
     user_input: str
-    result: Annotated[str, "replace"]
-    next: str
+    result: Annotated[str, merge_results]
+    next: list[str]
     category: str
 
 # ============================================
 # ✅ Parent Node Decision
 # ============================================
+# Operators match anywhere, words only as whole words ("sum" must not match "summarize")
+CALCULATOR_PATTERN = re.compile(r"[+\-*/]|\b(?:calculate|sum)\b")
+
+@instrument("decide_category")
 def decide_category(state: GraphState):
     text = state["user_input"].lower()
-    if any(k in text for k in ["+", "-", "*", "/", "calculate", "sum"]):
+    if CALCULATOR_PATTERN.search(text):
         category = "calculator"
     elif any(k in text for k in ["todo", "task", "remind"]):
         category = "manager"
@@ -49,12 +63,14 @@ def decide_category(state: GraphState):
 # ============================================
 
 # --- CALCULATOR ---
+@instrument("calculator")
 def calculator_node(state: GraphState):
     expr = state["user_input"].replace("calculate", "").strip()
     try:
         result = eval(expr, {"__builtins__": {}})
         msg = f"🧮 Result: {result}"
     except Exception:
+        record_error("calculator")
         msg = "⚠️ Could not calculate that."
     return {"result": msg}
 
@@ -62,6 +78,7 @@ def calculator_node(state: GraphState):
 if "todo_list" not in st.session_state:
     st.session_state.todo_list = []
 
+@instrument("manager")
 def todo_node(state: GraphState):
     text = state["user_input"].replace("todo", "").strip()
     if "add" in text:
@@ -78,20 +95,21 @@ def todo_node(state: GraphState):
     return {"result": msg}
 
 # --- AI Cluster: Conversation, QA, Summarization, Translation, Sentiment ---
+AI_INTENTS = {
+    "qa": ["who is", "what is", "where is", "question"],
+    "translate": ["translate"],
+    "summary": ["summarize", "summary"],
+    "sentiment": ["sentiment"],
+}
+
+@instrument("ai_router")
 def ai_router(state: GraphState):
+    """Pick every matching AI node; the graph fans out to them in parallel."""
     text = state["user_input"].lower()
-    if any(k in text for k in ["who is", "what is", "where is", "question"]):
-        next_node = "qa"
-    elif "translate" in text:
-        next_node = "translate"
-    elif "summarize" in text or "summary" in text:
-        next_node = "summary"
-    elif "sentiment" in text:
-        next_node = "sentiment"
-    else:
-        next_node = "conversation"
-    return {"next": next_node}
+    next_nodes = [node for node, keys in AI_INTENTS.items() if any(k in text for k in keys)]
+    return {"next": next_nodes or ["conversation"]}
 
+@instrument("qa")
 def qa_node(state: GraphState):
     query = state["user_input"]
     try:
@@ -101,11 +119,14 @@ def qa_node(state: GraphState):
             temperature=0.7,
             max_tokens=200,
         )
+        record_tokens("qa", response)
         msg = response.choices[0].message.content
     except Exception as e:
+        record_error("qa")
         msg = f"❌ QA Error: {str(e)}"
     return {"result": msg}
 
+@instrument("conversation")
 def conversation_node(state: GraphState):
     query = state["user_input"]
     try:
@@ -115,11 +136,14 @@ def conversation_node(state: GraphState):
             temperature=0.9,
             max_tokens=150,
         )
+        record_tokens("conversation", response)
         msg = response.choices[0].message.content
     except Exception as e:
+        record_error("conversation")
         msg = f"❌ Conversation error: {str(e)}"
     return {"result": f"💬 {msg}"}
 
+@instrument("summary")
 def summary_node(state: GraphState):
     text = state["user_input"]
     try:
@@ -129,11 +153,14 @@ def summary_node(state: GraphState):
             temperature=0.5,
             max_tokens=150,
         )
+        record_tokens("summary", response)
         msg = response.choices[0].message.content
     except Exception as e:
+        record_error("summary")
         msg = f"❌ Summary error: {str(e)}"
     return {"result": f"📝 Summary: {msg}"}
 
+@instrument("translate")
 def translate_node(state: GraphState):
     text = state["user_input"]
     try:
@@ -143,11 +170,14 @@ def translate_node(state: GraphState):
             temperature=0.5,
             max_tokens=100,
         )
+        record_tokens("translate", response)
         msg = response.choices[0].message.content
     except Exception as e:
+        record_error("translate")
         msg = f"❌ Translation error: {str(e)}"
     return {"result": f"🌍 Translation: {msg}"}
 
+@instrument("sentiment")
 def sentiment_node(state: GraphState):
     text = state["user_input"]
     try:
@@ -157,8 +187,10 @@ def sentiment_node(state: GraphState):
             temperature=0.3,
             max_tokens=100,
         )
+        record_tokens("sentiment", response)
         msg = response.choices[0].message.content
     except Exception as e:
+        record_error("sentiment")
         msg = f"❌ Sentiment error: {str(e)}"
     return {"result": f"🧠 Sentiment: {msg}"}
 
@@ -194,6 +226,7 @@ def build_graph():
         },
     )
 
+    # Returning a list from the router runs all matching nodes in one step
     graph.add_conditional_edges(
         "ai_router",
         lambda s: s["next"],
@@ -309,30 +342,15 @@ if st.button("▶ Run Workflow"):
     if not query.strip():
         st.warning("Please enter something.")
     else:
-        state = {"user_input": query, "result": "", "next": "", "category": ""}
-        path = ["decide_category"]
-        cat = decide_category(state)["category"]
-        path.append(cat)
-
-        if cat == "calculator":
-            result = calculator_node(state)
-        elif cat == "manager":
-            result = todo_node(state)
-        elif cat == "ai":
-            next_ai = ai_router(state)["next"]
-            path.append(next_ai)
-            if next_ai == "qa":
-                result = qa_node(state)
-            elif next_ai == "summary":
-                result = summary_node(state)
-            elif next_ai == "translate":
-                result = translate_node(state)
-            elif next_ai == "sentiment":
-                result = sentiment_node(state)
-            else:
-                result = conversation_node(state)
-        else:
-            result = {"result": "⚠️ Unknown request."}
+        state = {"user_input": query, "result": "", "next": [], "category": ""}
+        result = st.session_state.graph.invoke(state)
+
+        cat = result.get("category", "")
+        path = ["decide_category", cat]
+        if cat == "ai":
+            path.extend(result.get("next", []))
+        if not result.get("result"):
+            result["result"] = "⚠️ Unknown request."
 
         st.session_state.active_path = path
         st.session_state.history.append(result["result"])
@@ -344,6 +362,10 @@ if st.session_state.history:
     for i, h in enumerate(st.session_state.history, 1):
         st.markdown(f"**{i}.** {h}")
 
+# Node metrics
+with st.sidebar.expander("📈 Node Metrics"):
+    st.json(snapshot()["nodes"])
+
 # Graph visualization
 st.subheader("🧩 LangGraph Flow Visualization")
 st.graphviz_chart(draw_graph(st.session_state.active_path))
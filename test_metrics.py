@@ -0,0 +1,84 @@
+from types import SimpleNamespace
+
+import pytest
+
+import metrics
+
+# Metrics are module-global, so each test uses its own node names
+
+
+def test_instrument_counts_every_call_and_samples_each_node(monkeypatch):
+    monkeypatch.setattr(metrics, "_SAMPLE_EVERY", 2)
+    first = metrics.instrument("sample_first")(lambda: None)
+    second = metrics.instrument("sample_second")(lambda: None)
+
+    # Nodes alternate like graph steps; both must still get half their calls timed
+    for _ in range(10):
+        first()
+        second()
+
+    nodes = metrics.snapshot()["nodes"]
+    for node in ("sample_first", "sample_second"):
+        assert nodes[node]["calls"] == 10
+        assert nodes[node]["latency_count"] == 5
+
+
+def test_raised_and_recorded_errors():
+    @metrics.instrument("errors")
+    def node(fail):
+        if fail:
+            raise ValueError("boom")
+        return "ok"
+
+    assert node(False) == "ok"
+    with pytest.raises(ValueError):
+        node(True)
+    metrics.record_error("errors")  # handled inside a node, as the Streamlit nodes do
+
+    m = metrics.snapshot()["nodes"]["errors"]
+    assert m["calls"] == 2
+    assert m["errors"] == 2
+    assert m["error_rate"] == 1.0
+
+
+def test_record_tokens_from_langchain_message():
+    message = SimpleNamespace(usage_metadata={"input_tokens": 12, "output_tokens": 30})
+    metrics.record_tokens("tokens_langchain", message)
+
+    m = metrics.snapshot()["nodes"]["tokens_langchain"]
+    assert (m["input_tokens"], m["output_tokens"]) == (12, 30)
+
+
+def test_record_tokens_from_openai_completion():
+    completion = SimpleNamespace(usage=SimpleNamespace(prompt_tokens=7, completion_tokens=3))
+    metrics.record_tokens("tokens_openai", completion)
+    metrics.record_tokens("tokens_openai", input_tokens=5)
+
+    m = metrics.snapshot()["nodes"]["tokens_openai"]
+    assert (m["input_tokens"], m["output_tokens"]) == (12, 3)
+
+
+@pytest.mark.parametrize("value, expected", [("0.25", 0.25), ("1", 1.0)])
+def test_parse_sample_rate(value, expected):
+    assert metrics._parse_sample_rate(value) == expected
+
+
+@pytest.mark.parametrize("value", ["2", "0", "-0.5", "nan", "abc"])
+def test_parse_sample_rate_rejects_bad_input(value):
+    with pytest.warns(UserWarning):
+        assert metrics._parse_sample_rate(value) == 1.0
+
+
+def test_prometheus_buckets_are_cumulative():
+    for seconds in (0.003, 0.2, 20.0):
+        metrics._observe("prom", seconds, failed=False)
+
+    lines = metrics.to_prometheus().splitlines()
+    assert 'node_latency_seconds_bucket{node="prom",le="0.005"} 1' in lines
+    assert 'node_latency_seconds_bucket{node="prom",le="0.1"} 1' in lines
+    assert 'node_latency_seconds_bucket{node="prom",le="0.25"} 2' in lines
+    assert 'node_latency_seconds_bucket{node="prom",le="10.0"} 2' in lines
+    assert 'node_latency_seconds_bucket{node="prom",le="+Inf"} 3' in lines
+    assert 'node_latency_seconds_count{node="prom"} 3' in lines
+    assert 'node_calls_total{node="prom"} 3' in lines
+    assert 'node_errors_total{node="prom"} 0' in lines
@@ -0,0 +1,76 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("streamlit")
+pytest.importorskip("langgraph")
+pytest.importorskip("openai")
+pytest.importorskip("graphviz")
+
+# The app builds its OpenAI client at import time; tests swap in their own stub
+with pytest.MonkeyPatch.context() as mp:
+    mp.setattr("openai.OpenAI", lambda **kwargs: None)
+    import streamlit_app
+
+DELAY = 0.5
+
+
+class SlowClient:
+    """Stands in for the OpenAI client; each call sleeps and tracks concurrency."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(DELAY)
+        with self.lock:
+            self.in_flight -= 1
+        message = SimpleNamespace(content="ok")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+
+def test_merge_results():
+    assert streamlit_app.merge_results("", "a") == "a"
+    assert streamlit_app.merge_results("a", "") == "a"
+    assert streamlit_app.merge_results("a", "b") == "a\n\nb"
+
+
+def test_ai_router_detects_multiple_intents():
+    state = {"user_input": "summarize this and give me the sentiment"}
+    assert streamlit_app.decide_category(state) == {"category": "ai"}
+    assert streamlit_app.ai_router(state) == {"next": ["summary", "sentiment"]}
+
+
+def test_ai_router_defaults_to_conversation():
+    assert streamlit_app.ai_router({"user_input": "hey there"}) == {"next": ["conversation"]}
+
+
+def test_calculator_keywords_match_whole_words():
+    assert streamlit_app.decide_category({"user_input": "calculate 25*4"}) == {"category": "calculator"}
+    assert streamlit_app.decide_category({"user_input": "give me a summary"}) == {"category": "ai"}
+
+
+def test_multi_intent_branches_run_in_parallel(monkeypatch):
+    client = SlowClient()
+    monkeypatch.setattr(streamlit_app, "client", client)
+    graph = streamlit_app.build_graph()
+    state = {"user_input": "summarize this and give me the sentiment", "result": "", "next": [], "category": ""}
+
+    start = time.perf_counter()
+    result = graph.invoke(state)
+    elapsed = time.perf_counter() - start
+
+    assert result["next"] == ["summary", "sentiment"]
+    assert "📝 Summary: ok" in result["result"]
+    assert "🧠 Sentiment: ok" in result["result"]
+    assert client.max_in_flight == 2
+    # Slowest branch, not the sum of both
+    assert elapsed < 2 * DELAY
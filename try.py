@@ -8,10 +8,12 @@ Run:
 """
 
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 import uuid
 import spacy
 import networkx as nx
+import metrics
 
 # Load spaCy NLP model
 nlp = spacy.load("en_core_web_sm")
@@ -42,9 +44,11 @@ def simple_text_from_upload(file: UploadFile) -> str:
     except Exception:
         return ""
 
+@metrics.instrument("extract_entities_relations")
 def extract_entities_relations(text: str):
     """NER + simple co-mention relation extraction."""
     doc = nlp(text)
+    metrics.record_tokens("extract_entities_relations", input_tokens=len(doc))
     entities = []
     for ent in doc.ents:
         entities.append({
@@ -117,6 +121,15 @@ async def graph_nodes():
 async def graph_edges():
     return list(GRAPH.edges(data=True))
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Per-node latency, token and error metrics in Prometheus text format."""
+    return metrics.to_prometheus()
+
+@app.get("/metrics.json")
+async def metrics_json():
+    return metrics.snapshot()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)